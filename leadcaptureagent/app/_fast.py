@@ -0,0 +1,25 @@
+"""Normalization and validation of extracted lead fields."""
+
+# Deletes every ASCII character that isn't a digit
+_ASCII_NON_DIGITS = str.maketrans("", "", "".join(chr(i) for i in range(128) if not chr(i).isdigit()))
+
+
+def normalize_phone(phone: str) -> str:
+    digits = (phone or "").translate(_ASCII_NON_DIGITS)
+    if not digits.isascii():
+        # Rare non-ASCII input: keep Unicode decimal digits, same as the \D regex did
+        digits = "".join(c for c in digits if c.isdecimal())
+    return digits
+
+
+def is_valid_email(email: str) -> bool:
+    r"""Same check as ^[^@\s]+@[^@\s]+\.[^@\s]+$, done with str scans instead of a regex."""
+    # Exactly one "@", with something before it
+    at = email.find("@")
+    if at < 1 or email.find("@", at + 1) != -1:
+        return False
+    # A "." in the domain with something on both sides of it
+    if email.find(".", at + 2, len(email) - 1) == -1:
+        return False
+    return not any(map(str.isspace, email))
+
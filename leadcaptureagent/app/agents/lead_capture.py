@@ -1,12 +1,22 @@
-import re
-from typing import Dict, Union
-from uuid import uuid4
+import logging
+import os
+from typing import Dict, List, Optional, Union
+from uuid import UUID, uuid4
 
+from .._fast import is_valid_email, normalize_phone
 from ..llm import LLMClient
 from ..llm_bedrock import BedrockLLMClient
 from ..models import Lead
 from ..repository import LeadRepository
 
+logger = logging.getLogger("leadcapture")
+
+
+def _gen_uuids(n: int) -> List[UUID]:
+    """n random (version 4) UUIDs from a single os.urandom call."""
+    raw = os.urandom(16 * n)
+    return [UUID(bytes=raw[i:i + 16], version=4) for i in range(0, 16 * n, 16)]
+
 
 class LeadCaptureAgent:
     """Agentic Lead Capture Agent using Strands agents with AWS Bedrock."""
@@ -20,18 +30,12 @@ class LeadCaptureAgent:
         return email
 
     def _is_valid_email(self, email: str) -> bool:
-        if not email:
-            return False
-        # basic check
-        return bool(re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", email))
+        return is_valid_email(email)
 
     def _normalize_phone(self, phone: str) -> str:
-        digits = re.sub(r"\D", "", phone or "")
-        return digits
-
-    def capture(self, input_text: str) -> Lead:
-        extracted: Dict[str, str] = self._llm.extract_lead_fields(input_text)
+        return normalize_phone(phone)
 
+    def _build_lead(self, extracted: Dict[str, str], lead_id: Optional[UUID] = None) -> Lead:
         full_name = (extracted.get("full_name") or "").strip()
         email_raw = extracted.get("email") or ""
         phone_raw = extracted.get("phone") or ""
@@ -44,18 +48,40 @@ class LeadCaptureAgent:
         if email and not self._is_valid_email(email):
             email = ""
 
-        lead = Lead(
-            id=uuid4(),
+        return Lead(
+            id=lead_id or uuid4(),
             full_name=full_name,
             email=email,
             phone=phone,
             source=source,
         )
 
+    def _build_leads(self, extracted_batch: List[Dict[str, str]]) -> List[Lead]:
+        """_build_lead for each extraction, with the batch's ids drawn in one go."""
+        ids = _gen_uuids(len(extracted_batch))
+        return [self._build_lead(extracted, lead_id) for extracted, lead_id in zip(extracted_batch, ids)]
+
+    async def capture(self, input_text: str) -> Lead:
+        extracted: Dict[str, str] = await self._llm.extract_lead_fields(input_text)
+
+        lead = self._build_lead(extracted)
+
         self._repo.add(lead)
 
-        print(f"EVENT: lead.created {lead.id}")
+        logger.info("lead.created %s", lead.id, extra={"lead_id": str(lead.id)})
 
         return lead
 
+    async def capture_many(self, texts: List[str]) -> List[Lead]:
+        """Capture several leads with a single batched extraction call."""
+        extracted_batch: List[Dict[str, str]] = await self._llm.extract_lead_fields_batch(texts)
+
+        leads = self._build_leads(extracted_batch)
+
+        self._repo.add_many(leads)
+
+        for lead in leads:
+            logger.info("lead.created %s", lead.id, extra={"lead_id": str(lead.id)})
+
+        return leads
 
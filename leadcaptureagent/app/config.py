@@ -0,0 +1,55 @@
+"""Service configuration, read from the environment once at import."""
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    # OpenAI-compatible client (LLMClient)
+    openai_api_key: Optional[str]
+    openai_base_url: str
+    openai_model: str
+    # Upper bound on in-flight completions from one LLMClient
+    llm_max_concurrency: int
+
+    # AWS Bedrock client (BedrockLLMClient)
+    aws_region: str
+    # Available models (check with: aws bedrock list-foundation-models --region us-east-1):
+    # - anthropic.claude-3-sonnet-20240229-v1:0 (Claude 3 Sonnet - base)
+    # - anthropic.claude-3-sonnet-20240229-v1:0:28k (Claude 3 Sonnet - 28k context)
+    # - anthropic.claude-3-sonnet-20240229-v1:0:200k (Claude 3 Sonnet - 200k context)
+    # - anthropic.claude-sonnet-4-20250514-v1:0 (Claude Sonnet 4)
+    # - anthropic.claude-sonnet-4-5-20250929-v1:0 (Claude Sonnet 4.5)
+    bedrock_model_id: str
+    bedrock_temperature: float
+    # Seconds a cached extraction stays valid
+    bedrock_cache_ttl: float
+    # Most Strands agents kept for concurrent requests
+    bedrock_agent_pool_size: int
+
+    # Longest lead text accepted by the API, in characters
+    max_lead_text_length: int
+    # Most lead texts accepted in one batch request
+    max_batch_size: int
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            openai_base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+            openai_model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+            llm_max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+            aws_region=os.getenv("AWS_REGION", "us-east-1"),
+            bedrock_model_id=os.getenv("BEDROCK_MODEL_ID", "anthropic.claude-3-5-sonnet-20240620-v1:0"),
+            bedrock_temperature=float(os.getenv("BEDROCK_TEMPERATURE", "0.3")),
+            bedrock_cache_ttl=float(os.getenv("BEDROCK_CACHE_TTL", "3600")),
+            bedrock_agent_pool_size=int(os.getenv("BEDROCK_AGENT_POOL_SIZE", "8")),
+            max_lead_text_length=int(os.getenv("MAX_LEAD_TEXT_LENGTH", "4096")),
+            max_batch_size=int(os.getenv("MAX_BATCH_SIZE", "100")),
+        )
+
+
+# Loaded once per process; clients read this unless given their own Settings
+settings = Settings.from_env()
@@ -1,32 +1,157 @@
+import asyncio
+import functools
 import json
-import os
 import re
-from typing import Dict
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config
+from .config import Settings
+
+try:
+    import httpx
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+except ImportError:  # pragma: no cover
+    # Only LLMClient needs openai; the error is raised when it's actually used
+    AsyncOpenAI = None
+
+try:
+    # Faster parser for model responses; its decode error subclasses json.JSONDecodeError
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover
+    json_loads = json.loads
+
+try:
+    # Linear-time (DFA) engine for MockLLMClient's scans over free-form text
+    import re2
+except ImportError:  # pragma: no cover
+    # google-re2 is optional; the stdlib engine accepts the same patterns
+    re2 = re
+
+# First {...} span in free-form model output
+_JSON_OBJ_RE = re.compile(r"\{[\s\S]*\}")
+
+# Longer inputs are never cached, so a few large payloads can't crowd out the cache
+MAX_CACHED_TEXT_LEN = 8192
+
+
+def coerce_lead_fields(data: Dict[str, Any]) -> Dict[str, str]:
+    """Map a raw model response onto the lead field dict, filling in defaults.
+
+    Values go through str() since models sometimes return e.g. the phone as a JSON number.
+    """
+    return {
+        "full_name": str(data.get("full_name") or "").strip(),
+        "email": str(data.get("email") or "").strip(),
+        "phone": str(data.get("phone") or "").strip(),
+        "source": str(data.get("source") or "manual").strip() or "manual",
+    }
+
+
+class ExtractionCache:
+    """Bounded LRU of extracted lead fields keyed by input text, with optional expiry."""
+
+    def __init__(self, maxsize: int = 4096, ttl: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, str]]]" = OrderedDict()
+
+    def get(self, text: str) -> Optional[Dict[str, str]]:
+        entry = self._entries.get(text)
+        if entry is None:
+            return None
+        stored_at, fields = entry
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._entries[text]
+            return None
+        self._entries.move_to_end(text)
+        return dict(fields)
+
+    def put(self, text: str, fields: Dict[str, str]) -> None:
+        if len(text) > MAX_CACHED_TEXT_LEN:
+            return
+        self._entries[text] = (time.monotonic(), dict(fields))
+        self._entries.move_to_end(text)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
 
 
 class LLMClient:
     """OpenAI-compatible client placeholder. Not used by default.
 
-    Configure via env: OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MODEL
+    Configure via env: OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MODEL (see config.Settings)
     """
 
-    def __init__(self) -> None:
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        self.base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
-        self.model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    def __init__(self, settings: Optional[Settings] = None) -> None:
+        settings = settings or config.settings
+        self.api_key = settings.openai_api_key
+        self.base_url = settings.openai_base_url
+        self.model = settings.openai_model
+        # Upper bound on in-flight completions from this client
+        self.max_concurrency = settings.llm_max_concurrency
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Identical inputs (retries, replays) are answered without another completion
+        self._cache = ExtractionCache()
 
-    def extract_lead_fields(self, input_text: str) -> Dict[str, str]:
-        try:
-            from openai import OpenAI, DefaultHttpxClient
-        except Exception as e:  # pragma: no cover
-            raise RuntimeError("openai package not installed. Please install from requirements.txt") from e
+        # One client (and connection pool) shared by every request made through this instance
+        self._client = None
+        if AsyncOpenAI is not None and self.api_key:
+            # Construct a default http client without passing unsupported kwargs (e.g., proxies)
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+            )
+            self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http_client)
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        if self._client is not None:
+            await self._client.close()
 
-        if not self.api_key:
+    async def _chat_json(self, system: str, user: str) -> Dict[str, Any]:
+        if AsyncOpenAI is None:  # pragma: no cover
+            raise RuntimeError("openai package not installed. Please install from requirements.txt")
+
+        if self._client is None:
             raise RuntimeError("OPENAI_API_KEY is not set")
 
-        # Construct a default http client without passing unsupported kwargs (e.g., proxies)
-        http_client = DefaultHttpxClient()
-        client = OpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http_client)
+        client = self._client
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ]
+
+        async with self._semaphore:
+            try:
+                resp = await client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0,
+                    response_format={"type": "json_object"},
+                )
+                content = resp.choices[0].message.content or "{}"
+                return json_loads(content)
+            except Exception:
+                # Fallback: empty fields structure if the provider doesn't support response_format
+                try:
+                    # Retry without response_format
+                    resp = await client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=0,
+                    )
+                    content = resp.choices[0].message.content or "{}"
+                    # Try to parse JSON from free-form content
+                    # Extract first JSON object
+                    match = _JSON_OBJ_RE.search(content)
+                    return json_loads(match.group(0)) if match else {}
+                except Exception as e:
+                    raise RuntimeError(f"LLM extraction failed: {e}") from e
+
+    async def extract_lead_fields(self, input_text: str) -> Dict[str, str]:
+        cached = self._cache.get(input_text)
+        if cached is not None:
+            return cached
 
         system = (
             "You are an information extraction assistant. Extract lead fields as strict JSON with keys: "
@@ -38,92 +163,122 @@ class LLMClient:
             "Respond with a JSON object like: {\"full_name\": \"...\", \"email\": \"...\", \"phone\": \"...\", \"source\": \"manual\"}"
         )
 
-        try:
-            resp = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user},
-                ],
-                temperature=0,
-                response_format={"type": "json_object"},
-            )
-            content = resp.choices[0].message.content or "{}"
-            data = json.loads(content)
-        except Exception:
-            # Fallback: empty fields structure if the provider doesn't support response_format
-            try:
-                # Retry without response_format
-                resp = client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": system},
-                        {"role": "user", "content": user},
-                    ],
-                    temperature=0,
-                )
-                content = resp.choices[0].message.content or "{}"
-                # Try to parse JSON from free-form content
-                # Extract first JSON object
-                match = re.search(r"\{[\s\S]*\}", content)
-                data = json.loads(match.group(0)) if match else {}
-            except Exception as e:
-                raise RuntimeError(f"LLM extraction failed: {e}") from e
+        fields = coerce_lead_fields(await self._chat_json(system, user))
+        self._cache.put(input_text, fields)
+        return fields
 
-        return {
-            "full_name": (data.get("full_name") or "").strip(),
-            "email": (data.get("email") or "").strip(),
-            "phone": (data.get("phone") or "").strip(),
-            "source": (data.get("source") or "manual").strip() or "manual",
-        }
+    async def extract_lead_fields_batch(self, texts: List[str]) -> List[Dict[str, str]]:
+        """Extract lead fields for several inputs with a single completion.
+
+        Falls back to one call per input if the model doesn't return one lead per item.
+        """
+        if not texts:
+            return []
+
+        system = (
+            "You are an information extraction assistant. For every input item, extract lead fields with keys: "
+            "full_name, email, phone, source. Use 'manual' as default for source if not provided. "
+            "Respond with strict JSON of the form {\"leads\": [...]} holding exactly one object per input item, "
+            "in the same order as the input. Return only valid JSON without code fences."
+        )
+        items = [{"idx": idx, "text": text} for idx, text in enumerate(texts)]
+        user = (
+            f"Input items:\n{json.dumps(items, ensure_ascii=False)}\n\n"
+            "Respond with a JSON object like: {\"leads\": [{\"full_name\": \"...\", \"email\": \"...\", \"phone\": \"...\", \"source\": \"manual\"}]}"
+        )
+
+        try:
+            data = await self._chat_json(system, user)
+        except RuntimeError as e:
+            print(f"WARNING: Failed to parse batch JSON from LLM response: {e}")
+            data = None
+        leads = data.get("leads") if isinstance(data, dict) else None
+        # Per-item fallback; the semaphore still bounds how many calls are in flight
+        if not isinstance(leads, list) or len(leads) != len(texts) or not all(isinstance(d, dict) for d in leads):
+            return list(await asyncio.gather(*(self.extract_lead_fields(text) for text in texts)))
+        return [coerce_lead_fields(data) for data in leads]
 
 
 class MockLLMClient:
     """Deterministic extractor for local testing without network/API keys.
 
-    Uses simple regex heuristics to extract fields from free-form text.
+    Uses simple regex heuristics to extract fields from free-form text. Patterns are
+    compiled with google-re2 when it's installed, so scans stay linear in the input
+    length (no backtracking blow-ups on long or adversarial text).
     """
 
-    EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+\-]+@[a-zA-Z0-9\-]+\.[a-zA-Z0-9\-.]+")
-    PHONE_RE = re.compile(r"(?:\+?\d[\s\-()]?){7,15}")
+    EMAIL_RE = re2.compile(r"[a-zA-Z0-9_.+\-]+@[a-zA-Z0-9\-]+\.[a-zA-Z0-9\-.]+")
+    PHONE_RE = re2.compile(r"(?:\+?\d[\s\-()]?){7,15}")
+    # Single pass over the text for the name. Email and phone are searched on their own:
+    # their spans overlap name words and digits, so fusing them in would hide those.
+    # At any position a name introduction (my name is X, I am X, I'm X, this is X)
+    # wins over a bare capitalized word.
+    # Flags are inline because re2.compile doesn't take re-style flag arguments.
+    SCAN_RE = re2.compile(
+        r"(?P<intro0>(?i:\bmy name is))"
+        r"|(?P<intro1>(?i:\b(?:I am|I'm)))"
+        r"|(?P<intro2>(?i:\bthis is))"
+        r"|(?P<word>\b[A-Z][a-zA-Z]+\b)"
+    )
+    # The name following an introduction, matched in place right after it
+    NAME_TAIL_RE = re2.compile(r"(?i)\s+([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*){0,3})")
+    NAME_WORD_RE = re2.compile(r"\b[A-Z][a-zA-Z]+\b")
 
-    def _extract_name(self, text: str) -> str:
-        text = text or ""
-        # Common patterns: my name is X, I am X, I'm X, this is X
-        patterns = [
-            r"\bmy name is\s+([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*){0,3})",
-            r"\b(?:I am|I'm)\s+([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*){0,3})",
-            r"\bthis is\s+([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*){0,3})",
-        ]
-        for pat in patterns:
-            m = re.search(pat, text, flags=re.IGNORECASE)
-            if m:
-                # Keep original casing for the captured group
-                return m.group(1).strip()
+    def _scan(self, text: str) -> Tuple[str, str, str]:
+        """Return (name, email, phone) found in text."""
+        email_match = self.EMAIL_RE.search(text)
+        phone_match = self.PHONE_RE.search(text)
+        intros = ["", "", ""]
+        pair = word = ""
+        # Span of the previous capitalized word, to spot two in a row
+        prev_start = prev_end = -1
 
-        # Fallback: first name-like phrase (two consecutive capitalized words)
-        m = re.search(r"\b([A-Z][a-zA-Z]+\s+[A-Z][a-zA-Z]+)\b", text)
-        if m:
-            return m.group(1).strip()
+        def see_word(start: int, end: int) -> None:
+            nonlocal pair, word, prev_start, prev_end
+            if not word:
+                word = text[start:end]
+            if not pair and prev_end >= 0 and text[prev_end:start].isspace():
+                pair = text[prev_start:end]
+            prev_start, prev_end = start, end
 
-        # Fallback: single capitalized word early in the text
-        m = re.search(r"\b([A-Z][a-zA-Z]+)\b", text)
-        if m:
-            return m.group(1).strip()
+        for m in self.SCAN_RE.finditer(text):
+            kind = m.lastgroup
+            if kind == "word":
+                see_word(m.start(), m.end())
+            else:
+                idx = int(kind[-1])
+                tail = self.NAME_TAIL_RE.match(text, m.end())
+                if tail:
+                    # Keep original casing for the captured group
+                    intros[idx] = intros[idx] or tail.group(1).strip()
+                else:
+                    # Not an introduction after all; its words may still be name candidates
+                    for w in self.NAME_WORD_RE.finditer(text, m.start(), m.end()):
+                        see_word(w.start(), w.end())
+            if intros[0]:
+                break
 
-        return ""
+        # Introductions first, then two consecutive capitalized words, then a single one
+        name = intros[0] or intros[1] or intros[2] or pair or word
+        return (
+            name,
+            email_match.group(0) if email_match else "",
+            phone_match.group(0) if phone_match else "",
+        )
 
-    def extract_lead_fields(self, input_text: str) -> Dict[str, str]:
-        email_match = self.EMAIL_RE.search(input_text or "")
-        phone_match = self.PHONE_RE.search(input_text or "")
+    _scan_cached = functools.lru_cache(maxsize=4096)(_scan)
 
-        name = self._extract_name(input_text)
+    async def extract_lead_fields(self, input_text: str) -> Dict[str, str]:
+        text = input_text or ""
+        scan = self._scan_cached if len(text) <= MAX_CACHED_TEXT_LEN else self._scan
+        name, email, phone = scan(text)
 
         return {
-            "full_name": name or "",
-            "email": email_match.group(0) if email_match else "",
-            "phone": phone_match.group(0) if phone_match else "",
+            "full_name": name,
+            "email": email,
+            "phone": phone,
             "source": "manual",
         }
 
-
+    async def extract_lead_fields_batch(self, texts: List[str]) -> List[Dict[str, str]]:
+        return [await self.extract_lead_fields(text) for text in texts]
@@ -1,7 +1,8 @@
+import asyncio
 import json
 import os
 import re
-from typing import Dict
+from typing import Dict, List, Optional
 
 try:
     from strands import Agent
@@ -11,34 +12,69 @@ except ImportError:
         "strands-agents package not installed. Install with: pip install strands-agents"
     )
 
+from . import config
+from .config import Settings
+from .llm import ExtractionCache, coerce_lead_fields, json_loads
+
+# JSON payload inside a ```json fence, a generic ``` fence, or bare in the text,
+# found in one scan; exactly one of the three groups is set on a match
+_BEDROCK_JSON_RE = re.compile(r"```json\s*(\{[\s\S]*?\})\s*```|```\s*(\{[\s\S]*?\})\s*```|(\{[\s\S]*\})")
+
 
 class BedrockLLMClient:
     """AWS Bedrock client using Strands agents with Claude Sonnet."""
 
-    def __init__(self) -> None:
+    # System prompt for structured extraction, shared by every agent and client
+    SYSTEM_PROMPT = (
+        "You are a lead capture assistant specialized in extracting structured information from free-form text. "
+        "Your task is to analyze user input and extract the following fields:\n\n"
+        "- full_name: The person's full name (e.g., 'John Doe', 'Praveen Kumar')\n"
+        "- email: Email address (e.g., 'user@example.com')\n"
+        "- phone: Phone number as digits only, no formatting (e.g., '9876543210')\n"
+        "- source: Lead source (default to 'manual' if not specified in the input)\n\n"
+        "IMPORTANT: You must respond with ONLY a valid JSON object containing these four fields. "
+        "Do not include any explanatory text, markdown formatting, or code blocks. "
+        "Example output format:\n"
+        '{"full_name": "John Doe", "email": "john@example.com", "phone": "9876543210", "source": "manual"}'
+    )
+
+    # System prompt for batch extraction: same fields, but one object per input item
+    # wrapped in {"leads": [...]}, which SYSTEM_PROMPT's single-object rule would forbid
+    BATCH_SYSTEM_PROMPT = (
+        "You are a lead capture assistant specialized in extracting structured information from free-form text. "
+        "You will receive a JSON array of input items, each with an idx and a text. "
+        "For every item, extract the following fields:\n\n"
+        "- full_name: The person's full name (e.g., 'John Doe', 'Praveen Kumar')\n"
+        "- email: Email address (e.g., 'user@example.com')\n"
+        "- phone: Phone number as digits only, no formatting (e.g., '9876543210')\n"
+        "- source: Lead source (default to 'manual' if not specified in the input)\n\n"
+        'IMPORTANT: You must respond with ONLY a valid JSON object of the form {"leads": [...]}, '
+        "holding exactly one object with these four fields per input item, in the same order as the input. "
+        "Do not include any explanatory text, markdown formatting, or code blocks. "
+        "Example output format for two input items:\n"
+        '{"leads": [{"full_name": "John Doe", "email": "john@example.com", "phone": "9876543210", "source": "manual"}, '
+        '{"full_name": "Jane Roe", "email": "", "phone": "9123456780", "source": "manual"}]}'
+    )
+
+    def __init__(self, settings: Optional[Settings] = None) -> None:
+        settings = settings or config.settings
+
         # AWS region for Bedrock (default: us-east-1)
-        self.region = os.getenv("AWS_REGION", "us-east-1")
-        
-        # Claude Sonnet model ID for Bedrock
-        # Available models (check with: aws bedrock list-foundation-models --region us-east-1):
-        # - anthropic.claude-3-sonnet-20240229-v1:0 (Claude 3 Sonnet - base)
-        # - anthropic.claude-3-sonnet-20240229-v1:0:28k (Claude 3 Sonnet - 28k context)
-        # - anthropic.claude-3-sonnet-20240229-v1:0:200k (Claude 3 Sonnet - 200k context)
-        # - anthropic.claude-sonnet-4-20250514-v1:0 (Claude Sonnet 4)
-        # - anthropic.claude-sonnet-4-5-20250929-v1:0 (Claude Sonnet 4.5)
-        # Using Claude 3 Sonnet base model as default (most widely available)
-        self.model_id = os.getenv(
-            "BEDROCK_MODEL_ID", 
-            "anthropic.claude-3-5-sonnet-20240620-v1:0"
-        )
-        
+        self.region = settings.aws_region
+
+        # Claude Sonnet model ID for Bedrock (available models are listed in config.Settings)
+        self.model_id = settings.bedrock_model_id
+
         # Temperature for generation
-        self.temperature = float(os.getenv("BEDROCK_TEMPERATURE", "0.3"))
-        
+        self.temperature = settings.bedrock_temperature
+
         # Set AWS region via environment if not already set
         # BedrockModel uses boto3 which reads from AWS_REGION env var or AWS config
-        if not os.getenv("AWS_REGION"):
+        if not os.environ.get("AWS_REGION"):
             os.environ["AWS_REGION"] = self.region
+
+        # Results for repeated inputs; entries expire so a model change is picked up
+        self._cache = ExtractionCache(ttl=settings.bedrock_cache_ttl)
         
         # Initialize Bedrock model
         # Note: region is configured via AWS_REGION env var, not passed as parameter
@@ -47,25 +83,51 @@ class BedrockLLMClient:
             temperature=self.temperature,
         )
         
-        # Create the agent with system prompt for structured extraction
-        self.agent = Agent(
-            model=self.model,
-            system_prompt=(
-                "You are a lead capture assistant specialized in extracting structured information from free-form text. "
-                "Your task is to analyze user input and extract the following fields:\n\n"
-                "- full_name: The person's full name (e.g., 'John Doe', 'Praveen Kumar')\n"
-                "- email: Email address (e.g., 'user@example.com')\n"
-                "- phone: Phone number as digits only, no formatting (e.g., '9876543210')\n"
-                "- source: Lead source (default to 'manual' if not specified in the input)\n\n"
-                "IMPORTANT: You must respond with ONLY a valid JSON object containing these four fields. "
-                "Do not include any explanatory text, markdown formatting, or code blocks. "
-                "Example output format:\n"
-                '{"full_name": "John Doe", "email": "john@example.com", "phone": "9876543210", "source": "manual"}'
-            ),
-        )
+        # Pool of agents sharing the model. Each Strands agent keeps conversation state,
+        # so one agent serves one request at a time; the pool grows on demand up to
+        # BEDROCK_AGENT_POOL_SIZE and concurrent requests wait for a free agent after that.
+        # Batch extraction has its own pool, since its agents run under BATCH_SYSTEM_PROMPT.
+        self.agent_pool_size = settings.bedrock_agent_pool_size
+        self._agent_pool: "asyncio.Queue[Agent]" = asyncio.Queue()
+        self.agent = self._new_agent(self.SYSTEM_PROMPT)
+        self._agent_pool.put_nowait(self.agent)
+        self._agents_created = {self.SYSTEM_PROMPT: 1, self.BATCH_SYSTEM_PROMPT: 0}
+        self._batch_agent_pool: "asyncio.Queue[Agent]" = asyncio.Queue()
+
+    def _new_agent(self, system_prompt: str) -> Agent:
+        return Agent(model=self.model, system_prompt=system_prompt)
+
+    def _extract_json(self, content: str) -> str:
+        """Pull the JSON payload out of an agent response (code block or bare object)."""
+        match = _BEDROCK_JSON_RE.search(content)
+        if match:
+            return match.group(1) or match.group(2) or match.group(3)
+
+        # Last resort: try parsing the entire content as JSON
+        return content
 
-    def extract_lead_fields(self, input_text: str) -> Dict[str, str]:
+    async def _invoke(self, prompt: str, batch: bool = False) -> str:
+        system_prompt = self.BATCH_SYSTEM_PROMPT if batch else self.SYSTEM_PROMPT
+        pool = self._batch_agent_pool if batch else self._agent_pool
+        if pool.empty() and self._agents_created[system_prompt] < self.agent_pool_size:
+            self._agents_created[system_prompt] += 1
+            agent = self._new_agent(system_prompt)
+        else:
+            agent = await pool.get()
+        try:
+            response = await agent.invoke_async(prompt)
+        finally:
+            # Extractions are independent; don't carry this conversation into the next one
+            agent.messages.clear()
+            pool.put_nowait(agent)
+        return str(response).strip()
+
+    async def extract_lead_fields(self, input_text: str) -> Dict[str, str]:
         """Extract lead fields using Strands agent with Claude Sonnet via Bedrock."""
+        cached = self._cache.get(input_text)
+        if cached is not None:
+            return cached
+
         try:
             # Construct the user prompt for extraction
             user_prompt = (
@@ -73,46 +135,13 @@ class BedrockLLMClient:
                 "Return a JSON object with the fields: full_name, email, phone, source."
             )
             
-            # Invoke the agent with the prompt
-            response = self.agent(user_prompt)
-            
-            # Convert response to string
-            content = str(response).strip()
-            
-            # Extract JSON from the response (handle various formats)
-            json_match = None
+            # Invoke the agent with the prompt and convert the response to string
+            content = await self._invoke(user_prompt)
             
-            # Try to extract from markdown code blocks
-            if "```json" in content:
-                match = re.search(r"```json\s*(\{.*?\})\s*```", content, re.DOTALL)
-                if match:
-                    json_match = match.group(1)
-            elif "```" in content:
-                # Generic code block
-                match = re.search(r"```\s*(\{.*?\})\s*```", content, re.DOTALL)
-                if match:
-                    json_match = match.group(1)
-            
-            # If no code block, try to find JSON object directly
-            if not json_match:
-                match = re.search(r"\{[\s\S]*\}", content)
-                if match:
-                    json_match = match.group(0)
-            
-            # Parse JSON
-            if json_match:
-                data = json.loads(json_match)
-            else:
-                # Last resort: try parsing the entire content as JSON
-                data = json.loads(content)
-            
-            # Ensure all required fields are present with defaults
-            return {
-                "full_name": (data.get("full_name") or "").strip(),
-                "email": (data.get("email") or "").strip(),
-                "phone": (data.get("phone") or "").strip(),
-                "source": (data.get("source") or "manual").strip() or "manual",
-            }
+            # Parse JSON and ensure all required fields are present with defaults
+            fields = coerce_lead_fields(json_loads(self._extract_json(content)))
+            self._cache.put(input_text, fields)
+            return fields
             
         except json.JSONDecodeError as e:
             # If JSON parsing fails, log and return empty structure
@@ -127,3 +156,33 @@ class BedrockLLMClient:
         except Exception as e:
             raise RuntimeError(f"Bedrock LLM extraction failed: {e}") from e
 
+    async def extract_lead_fields_batch(self, texts: List[str]) -> List[Dict[str, str]]:
+        """Extract lead fields for several inputs with a single agent invocation.
+
+        Falls back to one invocation per input if the response can't be matched to the inputs.
+        """
+        if not texts:
+            return []
+
+        items = [{"idx": idx, "text": text} for idx, text in enumerate(texts)]
+        user_prompt = (
+            "Extract lead information from each of the following input items:\n\n"
+            f"{json.dumps(items, ensure_ascii=False)}\n\n"
+            'Return a JSON object of the form {"leads": [...]} with exactly one object per input item, '
+            "in the same order, each with the fields: full_name, email, phone, source."
+        )
+
+        try:
+            content = await self._invoke(user_prompt, batch=True)
+            data = json_loads(self._extract_json(content))
+            leads = data.get("leads") if isinstance(data, dict) else None
+        except json.JSONDecodeError as e:
+            print(f"WARNING: Failed to parse batch JSON from agent response: {e}")
+            leads = None
+        except Exception as e:
+            raise RuntimeError(f"Bedrock LLM extraction failed: {e}") from e
+
+        # Per-item fallback, issued together rather than one after another
+        if not isinstance(leads, list) or len(leads) != len(texts) or not all(isinstance(d, dict) for d in leads):
+            return list(await asyncio.gather(*(self.extract_lead_fields(text) for text in texts)))
+        return [coerce_lead_fields(data) for data in leads]
@@ -1,13 +1,39 @@
+import logging
 import os
-from fastapi import FastAPI
+import queue
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
+
+from fastapi import FastAPI, Response
 
 from .agents.lead_capture import LeadCaptureAgent
 from .llm_bedrock import BedrockLLMClient
-from .models import Lead, LeadCaptureRequest
+from .models import LeadBatchCaptureRequest, LeadCaptureRequest, lead_encoder
 from .repository import LeadRepository
 
 
-app = FastAPI(title="Lead Capture Agent")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Request handlers only enqueue log records; a background thread writes them out
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+    listener = QueueListener(log_queue, stream)
+    handler = QueueHandler(log_queue)
+
+    logger = logging.getLogger("leadcapture")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    listener.start()
+    try:
+        yield
+    finally:
+        listener.stop()
+        logger.removeHandler(handler)
+
+
+app = FastAPI(title="Lead Capture Agent", lifespan=lifespan)
 
 
 # Initialize repository
@@ -23,8 +49,14 @@ _llm = BedrockLLMClient()
 _agent = LeadCaptureAgent(llm=_llm, repo=_repo)
 
 
-@app.post("/leads", response_model=Lead)
-def create_lead(payload: LeadCaptureRequest) -> Lead:
-    return _agent.capture(payload.text)
+# Lead is a msgspec struct; responses are encoded directly rather than through FastAPI's serializer
+@app.post("/leads")
+async def create_lead(payload: LeadCaptureRequest) -> Response:
+    lead = await _agent.capture(payload.text)
+    return Response(content=lead_encoder.encode(lead), media_type="application/json")
 
 
+@app.post("/leads/batch")
+async def create_leads_batch(payload: LeadBatchCaptureRequest) -> Response:
+    leads = await _agent.capture_many(payload.texts)
+    return Response(content=lead_encoder.encode(leads), media_type="application/json")
@@ -1,16 +1,35 @@
+from typing import Annotated, List
 from uuid import UUID
+
+import msgspec
 from pydantic import BaseModel, Field
 
+from .config import settings
+
+
+class Lead(msgspec.Struct):
+    """A captured lead. Fields are already normalized and validated by the agent."""
 
-class Lead(BaseModel):
     id: UUID
     full_name: str
     email: str
     phone: str
-    source: str = Field(default="manual")
+    source: str = "manual"
+
+
+# Shared encoder for Lead responses (UUIDs are written as strings)
+lead_encoder = msgspec.json.Encoder()
+
+
+# Oversized input is rejected with a 422 before any extraction work
+LeadText = Annotated[str, Field(max_length=settings.max_lead_text_length)]
 
 
 class LeadCaptureRequest(BaseModel):
-    text: str
+    text: LeadText
+
+
+class LeadBatchCaptureRequest(BaseModel):
+    texts: List[LeadText] = Field(max_length=settings.max_batch_size)
 
 
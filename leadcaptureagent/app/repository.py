@@ -1,16 +1,59 @@
-from typing import List
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
 
 from .models import Lead
 
 
 class LeadRepository:
+    """In-memory lead store, kept column-wise; Lead objects are built only on the way out."""
+
     def __init__(self) -> None:
-        self._leads: List[Lead] = []
+        self._ids: List[UUID] = []
+        self._full_name: List[str] = []
+        self._email: List[str] = []
+        self._phone: List[str] = []
+        self._source: List[str] = []
+        # email -> row of the first lead stored with it
+        self._email_index: Dict[str, int] = {}
+
+    def _row(self, i: int) -> Lead:
+        return Lead(
+            id=self._ids[i],
+            full_name=self._full_name[i],
+            email=self._email[i],
+            phone=self._phone[i],
+            source=self._source[i],
+        )
 
     def add(self, lead: Lead) -> None:
-        self._leads.append(lead)
+        if lead.email and lead.email not in self._email_index:
+            self._email_index[lead.email] = len(self._ids)
+        self._ids.append(lead.id)
+        self._full_name.append(lead.full_name)
+        self._email.append(lead.email)
+        self._phone.append(lead.phone)
+        self._source.append(lead.source)
 
-    def list(self) -> List[Lead]:
-        return list(self._leads)
+    def add_many(self, leads: Iterable[Lead]) -> None:
+        leads = list(leads)
+        if not leads:
+            return
+        start = len(self._ids)
+        for offset, lead in enumerate(leads):
+            if lead.email and lead.email not in self._email_index:
+                self._email_index[lead.email] = start + offset
+        ids, full_names, emails, phones, sources = zip(
+            *((lead.id, lead.full_name, lead.email, lead.phone, lead.source) for lead in leads)
+        )
+        self._ids.extend(ids)
+        self._full_name.extend(full_names)
+        self._email.extend(emails)
+        self._phone.extend(phones)
+        self._source.extend(sources)
 
+    def find_by_email(self, email: str) -> Optional[Lead]:
+        i = self._email_index.get(email)
+        return None if i is None else self._row(i)
 
+    def list(self) -> List[Lead]:
+        return [self._row(i) for i in range(len(self._ids))]
@@ -0,0 +1,97 @@
+"""Batch extraction falls back to per-item calls when the batch reply is unusable.
+
+Run from leadcaptureagent/: python -m unittest discover -s tests
+"""
+
+import asyncio
+import json
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from app.llm import LLMClient
+from app.llm_bedrock import BedrockLLMClient
+
+
+class FakeCompletions:
+    """Stands in for AsyncOpenAI's chat.completions, answering from a list of replies."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=self.replies.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def openai_client(replies):
+    client = LLMClient()
+    completions = FakeCompletions(replies)
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client, completions
+
+
+ITEM_REPLIES = [
+    json.dumps({"full_name": "Jane Roe", "email": "jane@x.io", "phone": 5551112222, "source": "web"}),
+    json.dumps({"full_name": "Bob", "email": "bob@y.com", "phone": "", "source": None}),
+]
+EXPECTED = [
+    {"full_name": "Jane Roe", "email": "jane@x.io", "phone": "5551112222", "source": "web"},
+    {"full_name": "Bob", "email": "bob@y.com", "phone": "", "source": "manual"},
+]
+
+
+class LLMClientBatchFallback(unittest.TestCase):
+    def test_unparseable_reply_falls_back(self):
+        # JSON mode and the plain retry both get a reply that isn't a JSON object
+        bad = 'Sure: [{"full_name": "Jane Roe"},{"full_name": "Bob"}]'
+        client, completions = openai_client([bad, bad] + ITEM_REPLIES)
+        leads = asyncio.run(client.extract_lead_fields_batch(["jane", "bob"]))
+        self.assertEqual(leads, EXPECTED)
+        self.assertEqual(completions.calls, 4)
+
+    def test_non_object_reply_falls_back(self):
+        client, completions = openai_client(["[1, 2]"] + ITEM_REPLIES)
+        leads = asyncio.run(client.extract_lead_fields_batch(["jane", "bob"]))
+        self.assertEqual(leads, EXPECTED)
+        self.assertEqual(completions.calls, 3)
+
+    def test_numeric_fields_are_coerced(self):
+        reply = json.dumps({"leads": [json.loads(r) for r in ITEM_REPLIES]})
+        client, completions = openai_client([reply])
+        leads = asyncio.run(client.extract_lead_fields_batch(["jane", "bob"]))
+        self.assertEqual(leads, EXPECTED)
+        self.assertEqual(completions.calls, 1)
+
+
+class FakeAgent:
+    """Stands in for a Strands agent, answering from a list shared by every agent."""
+
+    replies = []
+
+    def __init__(self, model=None, system_prompt=None):
+        self.messages = []
+
+    async def invoke_async(self, prompt):
+        return FakeAgent.replies.pop(0)
+
+
+class BedrockClientBatchFallback(unittest.TestCase):
+    def setUp(self):
+        patches = [mock.patch("app.llm_bedrock.Agent", FakeAgent), mock.patch("app.llm_bedrock.BedrockModel")]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.client = BedrockLLMClient()
+
+    def test_non_object_reply_falls_back(self):
+        FakeAgent.replies = ["[1, 2]"] + ITEM_REPLIES
+        leads = asyncio.run(self.client.extract_lead_fields_batch(["jane", "bob"]))
+        self.assertEqual(leads, EXPECTED)
+        self.assertEqual(FakeAgent.replies, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
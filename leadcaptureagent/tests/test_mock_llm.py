@@ -0,0 +1,80 @@
+"""MockLLMClient must extract the same fields as the original per-field regex searches.
+
+Run from leadcaptureagent/: python -m unittest discover -s tests
+"""
+
+import asyncio
+import random
+import re
+import unittest
+
+from app.llm import MockLLMClient
+
+
+# The original extractor: one independent search per field
+EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+\-]+@[a-zA-Z0-9\-]+\.[a-zA-Z0-9\-.]+")
+PHONE_RE = re.compile(r"(?:\+?\d[\s\-()]?){7,15}")
+NAME_PATTERNS = (
+    re.compile(r"\bmy name is\s+([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*){0,3})", re.IGNORECASE),
+    re.compile(r"\b(?:I am|I'm)\s+([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*){0,3})", re.IGNORECASE),
+    re.compile(r"\bthis is\s+([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*){0,3})", re.IGNORECASE),
+)
+NAME_PAIR_RE = re.compile(r"\b([A-Z][a-zA-Z]+\s+[A-Z][a-zA-Z]+)\b")
+NAME_WORD_RE = re.compile(r"\b([A-Z][a-zA-Z]+)\b")
+
+
+def reference_fields(text):
+    name = ""
+    for pat in NAME_PATTERNS:
+        m = pat.search(text)
+        if m:
+            name = m.group(1).strip()
+            break
+    else:
+        m = NAME_PAIR_RE.search(text) or NAME_WORD_RE.search(text)
+        if m:
+            name = m.group(1).strip()
+    email = EMAIL_RE.search(text)
+    phone = PHONE_RE.search(text)
+    return {
+        "full_name": name,
+        "email": email.group(0) if email else "",
+        "phone": phone.group(0) if phone else "",
+        "source": "manual",
+    }
+
+
+TOKENS = [
+    "Hi", "Hello", "there", "my", "name", "is", "My", "Name", "I", "am", "I'm", "this", "This",
+    "John", "Doe", "jane", "Smith", "John.Smith", "call", "me", "at", "+1", "555-123-4567",
+    "(555)", "1234567", "12345678", "john@x.com", "a.b+c@mail.co.uk", "x.com", "Email:", "x9@y.io",
+]
+SEPARATORS = [" ", " ", " ", "", "@", ".", ", ", "\n", "-"]
+
+
+class MockScanMatchesReference(unittest.TestCase):
+    def setUp(self):
+        self.client = MockLLMClient()
+
+    def extract(self, text):
+        return asyncio.run(self.client.extract_lead_fields(text))
+
+    def test_email_does_not_hide_name_or_phone(self):
+        for text in ("Hello John@x.com", "John.Smith@example.com", "12345678@x.com"):
+            with self.subTest(text=text):
+                self.assertEqual(self.extract(text), reference_fields(text))
+
+    def test_randomized_inputs(self):
+        rng = random.Random(0)
+        for _ in range(5000):
+            parts = []
+            for _ in range(rng.randint(0, 12)):
+                parts.append(rng.choice(TOKENS))
+                parts.append(rng.choice(SEPARATORS))
+            text = "".join(parts)
+            with self.subTest(text=text):
+                self.assertEqual(self.extract(text), reference_fields(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,6 +11,7 @@ from qualification_agent import (
     QUALIFICATION_SYSTEM_PROMPT
 )
 from utils import AgentTimer, calculate_cost, print_cost_summary
+from dataclasses import asdict
 import json
 
 
@@ -138,7 +139,7 @@ def test_mock_agent():
         response = agent.qualify(lead)
         
         # Estimate cost
-        prompt = f"Qualify lead: {json.dumps(lead.__dict__, default=str)}"
+        prompt = f"Qualify lead: {json.dumps(asdict(lead), default=str)}"
         cost_info = calculate_cost(prompt, response)
         print_cost_summary(cost_info)
     
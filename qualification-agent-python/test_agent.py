@@ -5,6 +5,10 @@ Run this to test the agent with pre-configured leads
 
 from qualification_agent import LeadInput, qualify_lead
 from utils import print_aws_config_status
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+import logging
+import queue
 import sys
 
 
@@ -103,28 +107,30 @@ def test_multiple_scenarios():
         }
     ]
     
-    results = []
-    
-    for scenario in test_leads:
-        print(f"\n\n{'='*60}")
-        print(f" Testing: {scenario['name']}")
-        print('='*60)
-        
+    def run_scenario(scenario):
         try:
             # Use verbose=False for multi-scenario testing
-            result = qualify_lead(scenario['lead'], verbose=False)
-            results.append({
+            qualify_lead(scenario['lead'], verbose=False)
+            return {
                 "scenario": scenario['name'],
                 "status": "Success",
                 "lead_id": scenario['lead'].id
-            })
+            }
         except Exception as e:
-            results.append({
+            print(f"\n[ERROR] Scenario {scenario['name']} failed: {str(e)}")
+            return {
                 "scenario": scenario['name'],
                 "status": "Failed",
                 "error": str(e)
-            })
-            print(f"\n[ERROR] Scenario failed: {str(e)}")
+            }
+    
+    # Scenarios are independent and spend their time waiting on Bedrock, so run them
+    # concurrently; results are collected in scenario order for the summary
+    for scenario in test_leads:
+        print(f" Testing: {scenario['name']}")
+    with ThreadPoolExecutor(max_workers=min(8, len(test_leads))) as executor:
+        futures = [executor.submit(run_scenario, scenario) for scenario in test_leads]
+        results = [future.result() for future in futures]
     
     # Summary
     print("\n\n" + "="*80)
@@ -168,4 +174,12 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    # Scenarios log from worker threads; a queue keeps them off a shared stream lock
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+    logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=[QueueHandler(log_queue)])
+    listener.start()
+    try:
+        main()
+    finally:
+        listener.stop()
@@ -9,8 +9,58 @@ from qualification_agent import (
     calculate_qualification_score,
     make_qualification_decision
 )
+from utils_numba import score_batch
 from datetime import datetime
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Test leads, built once at import
+_TEST_LEADS = (
+    # High-quality lead
+    LeadInput(
+        id="test-001",
+        tenant_id="tenant-123",
+        email="executive@fortune500.com",
+        phone="+1-555-111-2222",
+        budget="$750,000",
+        years_in_city=10,
+        occupation="Chief Technology Officer",
+        source="referral",
+        metadata={
+            "referred_by": "John Smith (existing client)",
+            "property_interest": "Luxury penthouse",
+            "timeline": "immediate"
+        }
+    ),
+    # Medium-quality lead
+    LeadInput(
+        id="test-002",
+        tenant_id="tenant-123",
+        email="freelancer@gmail.com",
+        phone="+1-555-333-4444",
+        budget="$200,000",
+        years_in_city=2,
+        occupation="Freelance Designer",
+        source="google-ads",
+        metadata={
+            "property_interest": "Studio or 1-bedroom",
+            "timeline": "6 months"
+        }
+    ),
+    # Low-quality lead
+    LeadInput(
+        id="test-003",
+        tenant_id="tenant-123",
+        email="student123@yahoo.com",
+        budget="$50,000",
+        years_in_city=0,
+        source="organic",
+        metadata={}
+    )
+)
 
 
 def test_qualification_logic():
@@ -19,52 +69,22 @@ def test_qualification_logic():
     print("[TEST] Testing Qualification Logic (Local)\n")
     print("="*80)
     
-    # Test leads
-    test_leads = [
-        # High-quality lead
-        LeadInput(
-            id="test-001",
-            tenant_id="tenant-123",
-            email="executive@fortune500.com",
-            phone="+1-555-111-2222",
-            budget="$750,000",
-            years_in_city=10,
-            occupation="Chief Technology Officer",
-            source="referral",
-            metadata={
-                "referred_by": "John Smith (existing client)",
-                "property_interest": "Luxury penthouse",
-                "timeline": "immediate"
-            }
-        ),
-        # Medium-quality lead
-        LeadInput(
-            id="test-002",
-            tenant_id="tenant-123",
-            email="freelancer@gmail.com",
-            phone="+1-555-333-4444",
-            budget="$200,000",
-            years_in_city=2,
-            occupation="Freelance Designer",
-            source="google-ads",
-            metadata={
-                "property_interest": "Studio or 1-bedroom",
-                "timeline": "6 months"
-            }
-        ),
-        # Low-quality lead
-        LeadInput(
-            id="test-003",
-            tenant_id="tenant-123",
-            email="student123@yahoo.com",
-            budget="$50,000",
-            years_in_city=0,
-            source="organic",
-            metadata={}
-        )
+    # Tool inputs for every lead, so the whole batch can also be scored in one pass
+    lead_dicts = [
+        {
+            'email': lead.email,
+            'phone': lead.phone,
+            'budget': lead.budget,
+            'years_in_city': lead.years_in_city,
+            'occupation': lead.occupation,
+            'source': lead.source,
+            'metadata': lead.metadata
+        }
+        for lead in _TEST_LEADS
     ]
+    batch_totals = score_batch(lead_dicts, [enrich_lead(lead.email, lead.phone) for lead in _TEST_LEADS])
     
-    for lead in test_leads:
+    for lead, lead_dict, batch_total in zip(_TEST_LEADS, lead_dicts, batch_totals):
         print(f"\n{'='*60}")
         print(f"Testing Lead: {lead.email}")
         print(f"Budget: {lead.budget or 'Not provided'}")
@@ -82,22 +102,14 @@ def test_qualification_logic():
             
             # Step 2: Calculate score
             print("\n[2] Scoring:")
-            lead_dict = {
-                'email': lead.email,
-                'phone': lead.phone,
-                'budget': lead.budget,
-                'years_in_city': lead.years_in_city,
-                'occupation': lead.occupation,
-                'source': lead.source,
-                'metadata': lead.metadata
-            }
-            
             score = calculate_qualification_score(lead_dict, enrichment)
             print(f"   Budget Score: {score['budget_score']}/30")
             print(f"   Intent Score: {score['intent_score']}/25")
             print(f"   Readiness Score: {score['readiness_score']}/25")
             print(f"   Engagement Score: {score['engagement_score']}/20")
             print(f"   TOTAL: {score['total_score']}/100 ({score['confidence']} confidence)")
+            print(f"   Batch TOTAL: {batch_total}/100 "
+                  f"({'matches' if batch_total == score['total_score'] else 'MISMATCH'})")
             
             # Step 3: Make decision
             print("\n[3] Decision:")
@@ -124,10 +136,8 @@ def test_qualification_logic():
             for step in decision['next_steps']:
                 print(f"      > {step}")
                 
-        except Exception as e:
-            print(f"\n[ERROR] Error: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("[ERROR] Lead %s failed", lead.id)
     
     print(f"\n{'='*80}")
     print("[OK] Local testing completed!")
@@ -4,53 +4,85 @@ Essential for testing the agent locally with realistic cost estimates
 """
 
 from typing import Dict, Any
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
 import time
 import os
-from datetime import datetime
+import sys
+import boto3
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; token counts fall back to a length estimate
+    tiktoken = None
 
 # Model pricing (per 1M tokens) - Using Bedrock pricing
-MODEL_PRICING = {
-    "anthropic.claude-3-5-sonnet-20241022-v2:0": {
-        "input": 3.00,   # $3.00 per 1M input tokens
-        "output": 15.00, # $15.00 per 1M output tokens
-    },
-    "anthropic.claude-3-haiku-20240307-v1:0": {
-        "input": 0.25,   # $0.25 per 1M input tokens
-        "output": 1.25,  # $1.25 per 1M output tokens
-    },
-    "amazon.nova-lite-v1:0": {
-        "input": 0.06,   # $0.06 per 1M input tokens
-        "output": 0.24,  # $0.24 per 1M output tokens
-    },
-    "amazon.nova-pro-v1:0": {
-        "input": 0.80,   # $0.80 per 1M input tokens
-        "output": 3.20,  # $3.20 per 1M output tokens
-    },
-    "amazon.titan-text-premier-v1:0": {
-        "input": 0.50,   # $0.50 per 1M input tokens
-        "output": 1.50,  # $1.50 per 1M output tokens
-    },
-    "amazon.titan-text-express-v1": {
-        "input": 0.13,   # $0.13 per 1M input tokens
-        "output": 0.17,  # $0.17 per 1M output tokens
-    },
-    "ai21.jamba-1-5-mini-v1:0": {
-        "input": 0.20,   # $0.20 per 1M input tokens
-        "output": 0.40,  # $0.40 per 1M output tokens
-    },
-    "meta.llama3-8b-instruct-v1:0": {
-        "input": 0.30,   # $0.30 per 1M input tokens
-        "output": 0.60,  # $0.60 per 1M output tokens
-    }
-}
+Pricing = namedtuple("Pricing", "input output")
+
+MODEL_PRICING = MappingProxyType({
+    "anthropic.claude-3-5-sonnet-20241022-v2:0": Pricing(
+        input=3.00,   # $3.00 per 1M input tokens
+        output=15.00, # $15.00 per 1M output tokens
+    ),
+    "anthropic.claude-3-haiku-20240307-v1:0": Pricing(
+        input=0.25,   # $0.25 per 1M input tokens
+        output=1.25,  # $1.25 per 1M output tokens
+    ),
+    "amazon.nova-lite-v1:0": Pricing(
+        input=0.06,   # $0.06 per 1M input tokens
+        output=0.24,  # $0.24 per 1M output tokens
+    ),
+    "amazon.nova-pro-v1:0": Pricing(
+        input=0.80,   # $0.80 per 1M input tokens
+        output=3.20,  # $3.20 per 1M output tokens
+    ),
+    "amazon.titan-text-premier-v1:0": Pricing(
+        input=0.50,   # $0.50 per 1M input tokens
+        output=1.50,  # $1.50 per 1M output tokens
+    ),
+    "amazon.titan-text-express-v1": Pricing(
+        input=0.13,   # $0.13 per 1M input tokens
+        output=0.17,  # $0.17 per 1M output tokens
+    ),
+    "ai21.jamba-1-5-mini-v1:0": Pricing(
+        input=0.20,   # $0.20 per 1M input tokens
+        output=0.40,  # $0.40 per 1M output tokens
+    ),
+    "meta.llama3-8b-instruct-v1:0": Pricing(
+        input=0.30,   # $0.30 per 1M input tokens
+        output=0.60,  # $0.60 per 1M output tokens
+    )
+})
+
+# Claude 3.5 Sonnet pricing, used for models not in the table
+_DEFAULT_PRICING = MODEL_PRICING["anthropic.claude-3-5-sonnet-20241022-v2:0"]
+
+
+def _load_encoder():
+    """BPE encoding used to count tokens, or None if tiktoken is missing or can't load it"""
+    if tiktoken is None:
+        return None
+    # Bedrock models don't publish their tokenizers; cl100k_base is a close stand-in
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
 
+# Loaded once at import: the first get_encoding call downloads the BPE file, and a slow
+# or failing network shouldn't stall the first qualification that estimates a cost
+_ENCODER = _load_encoder()
 
-def estimate_tokens(text: str) -> int:
+
+def estimate_tokens(text: str, model_id: str = "anthropic.claude-3-5-sonnet-20241022-v2:0") -> int:
     """
-    Rough estimation of tokens (1 token ≈ 4 characters)
+    Estimation of tokens with a BPE tokenizer when tiktoken is installed,
+    otherwise roughly (1 token ≈ 4 characters)
     For testing purposes only
     """
-    return len(text) // 4
+    if _ENCODER is None:
+        return len(text) // 4
+    return len(_ENCODER.encode(text, disallowed_special=()))
 
 
 def calculate_cost(
@@ -70,15 +102,15 @@ def calculate_cost(
         Dict with cost breakdown
     """
     # Get pricing or use Claude Sonnet as default
-    pricing = MODEL_PRICING.get(model_id, MODEL_PRICING["anthropic.claude-3-5-sonnet-20241022-v2:0"])
+    pricing = MODEL_PRICING.get(model_id, _DEFAULT_PRICING)
     
     # Estimate tokens
-    input_tokens = estimate_tokens(input_text)
-    output_tokens = estimate_tokens(output_text)
+    input_tokens = estimate_tokens(input_text, model_id)
+    output_tokens = estimate_tokens(output_text, model_id)
     
     # Calculate costs
-    input_cost = (input_tokens / 1_000_000) * pricing["input"]
-    output_cost = (output_tokens / 1_000_000) * pricing["output"]
+    input_cost = (input_tokens / 1_000_000) * pricing.input
+    output_cost = (output_tokens / 1_000_000) * pricing.output
     total_cost = input_cost + output_cost
     
     return {
@@ -88,45 +120,66 @@ def calculate_cost(
         "input_cost": input_cost,
         "output_cost": output_cost,
         "total_cost": total_cost,
-        "timestamp": datetime.now().isoformat()
+        "timestamp_ns": time.time_ns()  # format with datetime.fromtimestamp(ns / 1e9) when shown
     }
 
 
 def print_cost_summary(cost_info: Dict[str, Any]) -> None:
     """Pretty print cost information"""
-    print("\n[COST] COST ESTIMATE:")
-    print(f"  Model: {cost_info['model_id'].split('/')[-1]}")
-    print(f"  Input Tokens: ~{cost_info['input_tokens']:,}")
-    print(f"  Output Tokens: ~{cost_info['output_tokens']:,}")
-    print(f"  Input Cost: ${cost_info['input_cost']:.6f}")
-    print(f"  Output Cost: ${cost_info['output_cost']:.6f}")
-    print(f"  TOTAL COST: ${cost_info['total_cost']:.6f}")
+    # One write for the whole block
+    sys.stdout.write(
+        "\n[COST] COST ESTIMATE:\n"
+        f"  Model: {cost_info['model_id'].rpartition('/')[2]}\n"
+        f"  Input Tokens: ~{cost_info['input_tokens']:,}\n"
+        f"  Output Tokens: ~{cost_info['output_tokens']:,}\n"
+        f"  Input Cost: ${cost_info['input_cost']:.6f}\n"
+        f"  Output Cost: ${cost_info['output_cost']:.6f}\n"
+        f"  TOTAL COST: ${cost_info['total_cost']:.6f}\n"
+    )
 
 
 class AgentTimer:
-    """Simple timer context manager for performance tracking"""
+    """Simple timer context manager for performance tracking
+    Uses the monotonic perf counter; pass verbose=False to time without printing
+    """
     
-    def __init__(self, operation: str = "Operation"):
+    __slots__ = ("operation", "verbose", "_ns", "duration_ns")
+    
+    def __init__(self, operation: str = "Operation", verbose: bool = True):
         self.operation = operation
-        self.start_time = None
+        self.verbose = verbose
+        self._ns: int = 0
+        self.duration_ns: int = 0
         
     def __enter__(self):
-        self.start_time = time.time()
-        print(f"\n[TIMER] Starting {self.operation}...")
+        if self.verbose:
+            print(f"\n[TIMER] Starting {self.operation}...")
+        self._ns = time.perf_counter_ns()
         return self
         
     def __exit__(self, *args):
-        duration = time.time() - self.start_time
-        print(f"[TIMER] {self.operation} completed in {duration:.2f} seconds")
+        self.duration_ns = time.perf_counter_ns() - self._ns
+        if self.verbose:
+            print(f"[TIMER] {self.operation} completed in {self.duration_s:.2f} seconds")
+    
+    @property
+    def duration_s(self) -> float:
+        return self.duration_ns / 1e9
+
 
+@lru_cache(maxsize=1)
+def _aws_region() -> str:
+    """AWS region from the environment, read on first use and then fixed for the process"""
+    return os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION') or 'us-east-1'
 
+
+@lru_cache(maxsize=1)
 def validate_aws_config() -> Dict[str, bool]:
     """
     Check if AWS is properly configured for testing
     Returns dict with configuration status
+    Checked once per process; credential lookup can probe the instance metadata service
     """
-    import boto3
-    
     checks = {
         "aws_credentials": False,
         "aws_region": False,
@@ -143,7 +196,7 @@ def validate_aws_config() -> Dict[str, bool]:
         pass
     
     # Check AWS region (hardcoded to us-east-1)
-    region = os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION') or 'us-east-1'
+    region = _aws_region()
     if region:
         checks["aws_region"] = True
     
@@ -157,7 +210,7 @@ def validate_aws_config() -> Dict[str, bool]:
 def print_aws_config_status():
     """Print AWS configuration status for debugging"""
     checks = validate_aws_config()
-    region = os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION') or 'us-east-1'
+    region = _aws_region()
     
     print("\n[CONFIG] AWS Configuration Status:")
     print(f"  [OK] AWS Credentials: {'Found' if checks['aws_credentials'] else '[FAIL] Not found'}")